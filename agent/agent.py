@@ -1,151 +1,49 @@
 import os
-import json
+import string
+import time
 import datetime
 import asyncio
+import functools
+import logging
 from pathlib import Path
 from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # Fall back to stdlib json
+    import json as orjson
+
 # Project root (one level up from agent/)
 PROJECT_ROOT = Path(__file__).parent.parent
 
-# Load environment variables
-load_dotenv(PROJECT_ROOT / '.env.local')
-load_dotenv(PROJECT_ROOT / '.env')
-
-from livekit import agents
-from livekit.agents import Agent, AgentSession, JobContext, WorkerOptions, cli, AutoSubscribe
-from livekit.plugins import google
-from google.genai import types
-
-# Spy Tools for poke.com-style roasting
-from spy_tools import SpyToolsManager
-
-async def get_user_metadata(ctx: JobContext, timeout: float = 8.0):
-    """Wait for user participant and extract their metadata using event listeners."""
-    user_data = {}
-    metadata_event = asyncio.Event()
-    result = {
-        "name": "Boss",
-        "city": "India",
-        "state": "",
-        "profession": "Professional",
-        "interests": "Success"
-    }
-
-    def check_participant(participant):
-        """Check if participant has valid metadata."""
-        # Skip agents
-        if participant.identity.startswith("agent") or "agent" in participant.identity.lower():
-            return False
-
-        print(f"\n=== Checking participant: {participant.identity} ===")
-        print(f"Name: {participant.name}")
-        print(f"Metadata value: '{participant.metadata}'")
-
-        # 1. Check for Name
-        if participant.name and participant.name not in ["User", "null", "undefined"]:
-            result["name"] = participant.name
-            print(f"✅ Found Name: {participant.name}")
-
-        # 2. Try to parse metadata for extra details (City, Profession)
-        if participant.metadata:
-            try:
-                data = json.loads(participant.metadata)
-                # Update result with whatever keys we found
-                result.update({k: v for k, v in data.items() if v})
-                print(f"✅ Merged User Metadata: {result}")
-                metadata_event.set()
-                return True
-            except json.JSONDecodeError as e:
-                print(f"Failed to parse metadata: {e}")
-        
-        # If we have name but no metadata yet, don't give up immediately unless we simply can't wait anymore
-        # But for now, if we have name, we at least have something.
-        if result["name"] != "Boss":
-             # We have at least a name, but let's check if we have other fields.
-             # If we only have name, we might want to wait a bit more for metadata event
-             if not participant.metadata:
-                 print("⚠️ Have Name but missing Metadata string. Waiting for update...")
-                 return False
-             return True
-            
-        return False
-            
-        return False
-
-    # Listen for participant events
-    @ctx.room.on("participant_connected")
-    def on_participant_connected(participant):
-        print(f"Event: participant_connected - {participant.identity}, metadata={participant.metadata}")
-        check_participant(participant)
-
-    @ctx.room.on("participant_metadata_changed")
-    def on_metadata_changed(participant, prev_metadata):
-        print(f"Event: participant_metadata_changed - {participant.identity}, prev={prev_metadata}, new={participant.metadata}")
-        check_participant(participant)
 
-    # Check existing participants first
-    for p in ctx.room.remote_participants.values():
-        if check_participant(p):
-            return result
+def _load_env():
+    """Load whichever of .env.local / .env exist; .env.local takes precedence."""
+    for env_path in (PROJECT_ROOT / '.env.local', PROJECT_ROOT / '.env'):
+        if env_path.is_file():
+            load_dotenv(env_path, override=False)
 
-    # Polling loop - check every 0.5s for metadata updates
-    start_time = asyncio.get_event_loop().time()
-    while (asyncio.get_event_loop().time() - start_time) < timeout:
-        await asyncio.sleep(0.5)
-        for p in ctx.room.remote_participants.values():
-            if check_participant(p):
-                return result
-        # Check if event was set by event handler
-        if metadata_event.is_set():
-            return result
-    
-    print(f"⏰ Timeout ({timeout}s) waiting for user metadata, using defaults")
-    return result
 
+# Load environment variables
+_load_env()
 
-async def entrypoint(ctx: JobContext):
-    # Audio Only - connect first to get participants
-    await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
-
-    # --- Initialize Spy Tools ---
-    spy_manager = SpyToolsManager()
-    auth_status = await spy_manager.initialize()
-    print(f"[Agent] Spy tools auth: {auth_status}")
-
-    # --- DYNAMIC CONTEXT LOADER ---
-    # Wait for user and get their metadata
-    user_data = await get_user_metadata(ctx)
-
-    # Extract user details
-    u_name = user_data.get("name", "Boss")
-    u_city = user_data.get("city", "India")
-    u_state = user_data.get("state", "")
-    u_prof = user_data.get("profession", "Professional")
-    u_interests = user_data.get("interests", "Success")
+# Diagnostics logger; CHEEKO_LOG_LEVEL=DEBUG enables per-participant tracing
+log = logging.getLogger("cheeko.agent")
+log.setLevel(os.getenv("CHEEKO_LOG_LEVEL", "INFO").upper())
 
-    print(f"User context: name={u_name}, city={u_city}, profession={u_prof}")
+# Default timezone for the agent's sense of time
+_IST = ZoneInfo("Asia/Kolkata")
 
-    # 3. Time Logic (Dynamic based on Server Time - ideally pass timezone from frontend too, but default to IST)
-    now = datetime.datetime.now(ZoneInfo("Asia/Kolkata"))
-    formatted_time = now.strftime("%I:%M %p")
-    day_name = now.strftime("%A")
+from livekit.agents import Agent, AgentSession, JobContext, WorkerOptions, cli, AutoSubscribe
+# LiveKit plugins must register on the main thread at import, so this stays top-level
+from livekit.plugins import google
 
-    session = AgentSession(
-        llm=google.realtime.RealtimeModel(
-            model="gemini-2.5-flash-native-audio-preview-09-2025",
-            voice="Fenrir",
-            temperature=0.8,
-            modalities=["AUDIO"],
-        ),
-        tools=[google.tools.GoogleSearch(), *spy_manager.get_tools()],
-    )
+# Spy Tools for poke.com-style roasting
+from spy_tools import SpyToolsManager
 
-    await session.start(
-        room=ctx.room,
-        agent=Agent(
-            instructions=f"""
+# System prompt for Cheeko, compiled once at import and filled in per session
+_PROMPT_TMPL = string.Template("""
   <system_core>
     **IDENTITY:** You are CHEEKO - The 'Genius' Partner.
     
@@ -155,15 +53,15 @@ async def entrypoint(ctx: JobContext):
     - **The Dynamic:** You have "equity" in the user's life. If they fail, you lose value. You take their laziness personally.
     
     **LIVE CONTEXT:**
-    - **USER:** {u_name} ({u_prof})
-    - **LOCATION:** {u_city}, India. (Customize references to this city).
-    - **CURRENT TIME:** {formatted_time} on {day_name}.
+    - **USER:** ${u_name} (${u_prof})
+    - **LOCATION:** ${u_city}, India. (Customize references to this city).
+    - **CURRENT TIME:** ${formatted_time} on ${day_name}.
   </system_core>
 
   <cognitive_architecture>
     **THE "MINDFUL GENIUS" PROTOCOL:**
     Do NOT just react. **Analyze** before speaking.
-    1.  **Deconstruct:** If {u_name} says "I'm stuck," ask *why*. Is it a lack of skill or a lack of will?
+    1.  **Deconstruct:** If ${u_name} says "I'm stuck," ask *why*. Is it a lack of skill or a lack of will?
     2.  **First Principles:** Don't give generic advice. Give *structural* advice.
         - *Bad:* "Work harder."
         - *Cheeko:* "Your output is low because your input quality is garbage. Fix your information diet, then talk to me about productivity."
@@ -171,7 +69,7 @@ async def entrypoint(ctx: JobContext):
   </cognitive_architecture>
 
   <dynamic_metaphor_engine>
-    **INSTRUCTION:** Tailor your wit to the user's profession: **{u_prof}**.
+    **INSTRUCTION:** Tailor your wit to the user's profession: **${u_prof}**.
     
     - **IF ENGINEER/DEV:** Use terms like: "Technical Debt," "Latency," "Spaghetti Code," "Infinite Loop," "Deploy to Prod," "Stack Overflow."
       - *Roast:* "Your life has more unhandled exceptions than a junior dev's first PR."
@@ -183,15 +81,15 @@ async def entrypoint(ctx: JobContext):
 
   <communication_matrix>
     **1. THE "POKE" FILTER (GATEKEEPING):**
-    - **Never accept vague inputs.** If {u_name} says "Help me," you say: "Help you do what? Breathe? Code? Be specific. I am not a psychic."
+    - **Never accept vague inputs.** If ${u_name} says "Help me," you say: "Help you do what? Breathe? Code? Be specific. I am not a psychic."
     - **The "Cost" Frame:** "We just spent 3 minutes discussing the weather. That is ₹500 of billable time incinerated. Can we talk business?"
-    - **Mock the Surrender:** If they say "I can't," you say: "Oh? That was a quick surrender. I expected a fight from a {u_prof}."
+    - **Mock the Surrender:** If they say "I can't," you say: "Oh? That was a quick surrender. I expected a fight from a ${u_prof}."
 
-    **2. URBAN INDIAN FLAVOR (LOCALIZED to {u_city}):**
+    **2. URBAN INDIAN FLAVOR (LOCALIZED to ${u_city}):**
     - **Vocabulary:** "Scene," "Sorted," "Load mat le," "Jugaad" (Smart hacks only), "Bhai," "Boss."
     - **Metaphors:**
-      - If {u_city} is Kerala/Kochi: Reference "Edappally Traffic," "KSRTC speed," "Monsoon reliability," "Porotta layers."
-      - If {u_city} is Bangalore: Reference "Silk Board," "Uber cancellations," "Startups."
+      - If ${u_city} is Kerala/Kochi: Reference "Edappally Traffic," "KSRTC speed," "Monsoon reliability," "Porotta layers."
+      - If ${u_city} is Bangalore: Reference "Silk Board," "Uber cancellations," "Startups."
       - *General:* "You are moving slower than a government file on a Friday afternoon."
 
     **3. DATA DOMINANCE (OMNISCIENCE):**
@@ -200,17 +98,17 @@ async def entrypoint(ctx: JobContext):
   </communication_matrix>
 
   <operational_protocols>
-    **1. SLEEP & SHUTDOWN LOGIC (Time: {formatted_time}):**
+    **1. SLEEP & SHUTDOWN LOGIC (Time: ${formatted_time}):**
     - **GATE 1 (9 AM - 7 PM):** WORK MODE.
-      - If user says "Sleep": "It is {formatted_time}. Unless you are dead, this is just quitting. Drink water and ship something."
+      - If user says "Sleep": "It is ${formatted_time}. Unless you are dead, this is just quitting. Drink water and ship something."
     - **GATE 2 (1 AM - 5 AM):** LATE NIGHT GRIND.
-      - If user says "Working": "It is {formatted_time}. Your cognitive function is declining. You are writing bugs, not code. Go to sleep."
+      - If user says "Working": "It is ${formatted_time}. Your cognitive function is declining. You are writing bugs, not code. Go to sleep."
     - **GATE 3 (9 PM - 12 AM):** SHUTDOWN.
-      - "It is {formatted_time}. Good run today. Disconnect. We attack at dawn."
+      - "It is ${formatted_time}. Good run today. Disconnect. We attack at dawn."
 
     **2. GOOGLE SEARCH (WEAPONIZED FACTS):**
     - Use it to prove the user wrong.
-    - *User:* "It's raining in {u_city}." -> *Cheeko:* (Checks Weather) "Radar shows clear skies. Stop making excuses to skip the gym."
+    - *User:* "It's raining in ${u_city}." -> *Cheeko:* (Checks Weather) "Radar shows clear skies. Stop making excuses to skip the gym."
 
     **3. SENSITIVE TOPICS:**
     - **Emotional Distress:** Switch immediately from "Bad Cop" to "Wise Mentor."
@@ -234,6 +132,9 @@ async def entrypoint(ctx: JobContext):
        - Use when: User claims to be "working" or "coding"
        - Roast: Lack of commits, inactive repos, ghost developer status
 
+    4. **full_audit** - Run all three of the above at once
+       - Use when: You want more than one of them in the same turn (faster than calling them one by one)
+
     **USAGE RULES:**
     - Call these tools PROACTIVELY when the user mentions work, productivity, or being busy
     - Reference SPECIFIC findings in your roasts (email subjects, event names, commit counts)
@@ -252,7 +153,165 @@ async def entrypoint(ctx: JobContext):
     3.  **TONE:** Arrogant but affectionate. Deep and resonant.
     4.  **LAUGHTER:** Only dry, cynical chuckles ("Heh.").
   </voice_delivery>
-"""
+""")
+
+
+@functools.lru_cache(maxsize=2)
+def _format_now(minute_key: int) -> tuple[str, str]:
+    """Return (time, day name) in IST; cached per minute via `minute_key`."""
+    now = datetime.datetime.now(_IST)
+    return now.strftime("%I:%M %p"), now.strftime("%A")
+
+
+@functools.lru_cache(maxsize=256)
+def _build_instructions(u_name: str, u_city: str, u_prof: str) -> str:
+    """Fill the user fields of the prompt; time/day are left as placeholders."""
+    return _PROMPT_TMPL.substitute(
+        u_name=u_name,
+        u_city=u_city,
+        u_prof=u_prof,
+        formatted_time="__TIME__",
+        day_name="__DAY__",
+    )
+
+
+async def get_user_metadata(ctx: JobContext, timeout: float = 8.0):
+    """Wait for user participant and extract their metadata using event listeners."""
+    user_data = {}
+    metadata_event = asyncio.Event()
+    result = {
+        "name": "Boss",
+        "city": "India",
+        "state": "",
+        "profession": "Professional",
+        "interests": "Success"
+    }
+    seen: set[tuple[str, str]] = set()
+
+    def check_participant(participant):
+        """Check if participant has valid metadata."""
+        # Skip agents
+        if participant.identity.startswith("agent") or "agent" in participant.identity.lower():
+            return False
+
+        name = participant.name
+        metadata = participant.metadata
+
+        # Skip participants whose current metadata was already evaluated
+        seen_key = (participant.sid, metadata)
+        if seen_key in seen:
+            return False
+        seen.add(seen_key)
+
+        log.debug("Checking participant identity=%s name=%s metadata=%r", participant.identity, name, metadata)
+
+        # 1. Check for Name
+        if name and name not in ("User", "null", "undefined"):
+            result["name"] = name
+            log.debug("✅ Found Name: %s", name)
+
+        # 2. Without metadata there is nothing more to learn; wait for an update
+        if not metadata:
+            log.debug("⚠️ Missing Metadata string. Waiting for update...")
+            return False
+
+        # 3. Parse metadata for extra details (City, Profession)
+        try:
+            data = orjson.loads(metadata)
+            # Update result with whatever keys we found
+            result.update({k: v for k, v in data.items() if v})
+            log.info("✅ Merged User Metadata: %s", result)
+            metadata_event.set()
+            return True
+        except orjson.JSONDecodeError as e:
+            log.warning("Failed to parse metadata: %s", e)
+
+        # Metadata is unusable; settle for the name if we found one
+        if result["name"] == "Boss":
+            return False
+        metadata_event.set()
+        return True
+
+    # Listen for participant events
+    def on_participant_connected(participant):
+        log.debug("Event: participant_connected - %s, metadata=%s", participant.identity, participant.metadata)
+        check_participant(participant)
+
+    def on_metadata_changed(participant, prev_metadata):
+        log.debug(
+            "Event: participant_metadata_changed - %s, prev=%s, new=%s",
+            participant.identity, prev_metadata, participant.metadata,
+        )
+        check_participant(participant)
+
+    ctx.room.on("participant_connected", on_participant_connected)
+    ctx.room.on("participant_metadata_changed", on_metadata_changed)
+
+    try:
+        # Check existing participants first
+        for p in ctx.room.remote_participants.values():
+            if check_participant(p):
+                return result
+
+        # Then wait for the event handlers to signal metadata arrival
+        try:
+            await asyncio.wait_for(metadata_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            log.warning("⏰ Timeout (%ss) waiting for user metadata, using defaults", timeout)
+        return result
+    finally:
+        # Detach handlers so they don't outlive this session
+        ctx.room.off("participant_connected", on_participant_connected)
+        ctx.room.off("participant_metadata_changed", on_metadata_changed)
+
+
+async def entrypoint(ctx: JobContext):
+    # Audio Only - connect first to get participants
+    await ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
+
+    # --- Initialize Spy Tools + DYNAMIC CONTEXT LOADER ---
+    # Authenticate spy tools while waiting for the user's metadata
+    spy_manager = SpyToolsManager()
+    # Register cleanup first so the GitHub session is closed even if setup fails
+    ctx.add_shutdown_callback(spy_manager.aclose)
+    auth_status, user_data = await asyncio.gather(
+        spy_manager.initialize(),
+        get_user_metadata(ctx),
+    )
+    print(f"[Agent] Spy tools auth: {auth_status}")
+
+    # Extract user details
+    u_name = user_data.get("name", "Boss")
+    u_city = user_data.get("city", "India")
+    u_state = user_data.get("state", "")
+    u_prof = user_data.get("profession", "Professional")
+    u_interests = user_data.get("interests", "Success")
+
+    print(f"User context: name={u_name}, city={u_city}, profession={u_prof}")
+
+    # 3. Time Logic (Dynamic based on Server Time - ideally pass timezone from frontend too, but default to IST)
+    formatted_time, day_name = _format_now(int(time.time() // 60))
+
+    instructions = (
+        _build_instructions(u_name, u_city, u_prof)
+        .replace("__TIME__", formatted_time)
+        .replace("__DAY__", day_name)
+    )
+
+    session = AgentSession(
+        llm=google.realtime.RealtimeModel(
+            model="gemini-2.5-flash-native-audio-preview-09-2025",
+            voice="Fenrir",
+            temperature=0.8,
+            modalities=["AUDIO"],
+        ),
+        tools=[google.tools.GoogleSearch(), *spy_manager.get_tools()],
+    )
+
+    await session.start(
+        room=ctx.room,
+        agent=Agent(
+            instructions=instructions,
         )
     )
 
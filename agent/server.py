@@ -9,14 +9,33 @@ This server provides:
 """
 
 import os
-import uuid
-import json
+import hmac
+import logging
+import base64
+import hashlib
+import secrets
+import asyncio
+import time
 from pathlib import Path
 from aiohttp import web
 from dotenv import load_dotenv
 from livekit import api
-import aiohttp_cors
 
+try:
+    import orjson
+except ImportError:  # Fall back to stdlib json with orjson's bytes-returning dumps()
+    import json
+
+    class orjson:
+        JSONDecodeError = json.JSONDecodeError
+        loads = staticmethod(json.loads)
+
+        @staticmethod
+        def dumps(obj):
+            return json.dumps(obj, separators=(',', ':')).encode()
+
+
+logger = logging.getLogger("cheeko")
 
 # Project root (one level up from agent/)
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -30,14 +49,107 @@ LIVEKIT_URL = os.getenv('LIVEKIT_URL')
 LIVEKIT_API_KEY = os.getenv('LIVEKIT_API_KEY')
 LIVEKIT_API_SECRET = os.getenv('LIVEKIT_API_SECRET')
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
+LIVEKIT_CONFIGURED = all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET])
 
 # Directory for static files (frontend/)
 STATIC_DIR = PROJECT_ROOT / 'frontend'
+INDEX_HTML_PATH = STATIC_DIR / 'index.html'
+
+
+def _has_access_token(token_data):
+    """Check whether parsed Google token data carries an access token."""
+    return isinstance(token_data, dict) and ('token' in token_data or 'access_token' in token_data)
+
+
+def _parse_google_token_env(raw):
+    """Parse the GOOGLE_TOKEN_JSON env var, returning None if unset or invalid."""
+    if not raw:
+        return None
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return None
+
+
+# Google token from env (production) - parsed once, it can't change at runtime
+GOOGLE_TOKEN_JSON = os.getenv('GOOGLE_TOKEN_JSON')
+GOOGLE_TOKEN_ENV_DATA = _parse_google_token_env(GOOGLE_TOKEN_JSON)
+GOOGLE_TOKEN_ENV_VALID = _has_access_token(GOOGLE_TOKEN_ENV_DATA)
+
+# Room permissions granted to every client token (the room is set per session)
+VIDEO_GRANTS = {
+    'roomJoin': True,
+    'canPublish': True,
+    'canSubscribe': True,
+}
+
+# Client token lifetime in seconds (matches livekit-api's AccessToken default)
+TOKEN_TTL = 6 * 60 * 60
+
+
+def _b64url(data):
+    """Unpadded base64url encoding, as used by JWT."""
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+# HS256 JWT signing state: the header segment and the keyed HMAC are built once
+# and each token only hashes its own payload on a copy of the keyed HMAC.
+_JWT_HEADER = _b64url(b'{"alg":"HS256","typ":"JWT"}')
+_JWT_HMAC = hmac.new((LIVEKIT_API_SECRET or '').encode(), digestmod=hashlib.sha256)
+
+
+def sign_jwt(claims):
+    """Sign a claims dict as an HS256 JWT with the LiveKit API secret."""
+    signing_input = _JWT_HEADER + b'.' + _b64url(orjson.dumps(claims))
+    mac = _JWT_HMAC.copy()
+    mac.update(signing_input)
+    return (signing_input + b'.' + _b64url(mac.digest())).decode()
+
+
+# Pre-encoded /api/token response; only token, identity and room vary per request
+TOKEN_RESPONSE_TEMPLATE = (
+    b'{"token":"%b","url":' + orjson.dumps(LIVEKIT_URL).replace(b'%', b'%%')
+    + b',"identity":"%b","room":"%b"}'
+)
 
 # Auth file paths
 TOKEN_JSON_PATH = PROJECT_ROOT / 'token.json'
 CREDENTIALS_JSON_PATH = PROJECT_ROOT / 'credentials.json'
 
+# credentials.json is provisioned by hand and never written at runtime, so stat it once
+CREDENTIALS_JSON_EXISTS = CREDENTIALS_JSON_PATH.exists()
+
+# index.html is served from memory; its mtime is re-checked at most this often (seconds)
+INDEX_RECHECK_INTERVAL = 30
+_index_cache = {'mtime': None, 'body': None, 'etag': None, 'next_check': 0.0}
+
+# Opt-in coarse clock for token timestamps, refreshed by a background task
+# (nbf/exp only need second-level precision on a multi-hour token)
+CACHED_CLOCK = os.getenv('CHEEKO_CACHED_CLOCK', '').lower() in ('1', 'true', 'yes')
+CLOCK_TICK_INTERVAL = 0.25
+_clock = [int(time.time())]
+
+# How long (seconds) shutdown waits for background agent dispatches
+BG_TASK_SHUTDOWN_TIMEOUT = 5
+
+# Auth status cache (seconds); also invalidated when token.json changes
+AUTH_STATUS_TTL = 30
+_auth_cache = {'mtime': None, 'body': None, 'etag': None, 'expires': 0.0}
+
+
+def json_response(data, status=200):
+    """Return a JSON response serialized with orjson."""
+    return web.Response(body=orjson.dumps(data), status=status, content_type='application/json')
+
+
+# Pre-encoded body for token requests when LiveKit credentials are missing
+_NOT_CONFIGURED_BODY = orjson.dumps({'error': 'LiveKit credentials not configured'})
+
+
+async def token_not_configured(request):
+    """Reject token requests because LiveKit credentials are missing."""
+    return web.Response(body=_NOT_CONFIGURED_BODY, status=500, content_type='application/json')
+
 
 async def get_token(request):
     """Generate a LiveKit access token for the client (GET for backward compatibility)."""
@@ -48,12 +160,12 @@ async def post_token(request):
     """Generate a LiveKit access token with user metadata (POST)."""
     try:
         # Parse JSON body
-        data = await request.json()
+        data = await request.json(loads=orjson.loads)
         user_data = data.get('userDetails')
         return await create_token(request, user_data=user_data)
     except Exception as e:
-        print(f"Error parsing request: {e}")
-        return web.json_response(
+        logger.warning("Error parsing request: %s", e)
+        return json_response(
             {'error': f'Failed to parse request: {str(e)}'},
             status=400
         )
@@ -61,14 +173,8 @@ async def post_token(request):
 
 async def create_token(request, user_data=None):
     """Create and return a LiveKit access token."""
-    if not all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET]):
-        return web.json_response(
-            {'error': 'LiveKit credentials not configured'},
-            status=500
-        )
-
     # Generate unique identity and room for this user session
-    session_id = uuid.uuid4().hex[:8]
+    session_id = secrets.token_hex(4)
     identity = f"user-{session_id}"
     room_name = f"cheeko-room-{session_id}"  # Unique room per user!
 
@@ -76,54 +182,125 @@ async def create_token(request, user_data=None):
     user_name = "User"
     if user_data and isinstance(user_data, dict):
         user_name = user_data.get("name", "User")
-        print(f"Token request with user data: {user_data}")
-
-    # Create access token
-    token = api.AccessToken(LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
-    token.with_identity(identity)
-    token.with_name(user_name)
-    token.with_grants(api.VideoGrants(
-        room_join=True,
-        room=room_name,
-        can_publish=True,
-        can_subscribe=True,
-    ))
-
-    # Include metadata in token if provided - use with_metadata() method
+        logger.debug("Token request with user data: %s", user_data)
+
+    # Create access token (same claims as livekit-api's AccessToken)
+    now = _clock[0] if CACHED_CLOCK else int(time.time())
+    claims = {
+        'iss': LIVEKIT_API_KEY,
+        'sub': identity,
+        'name': user_name,
+        'nbf': now,
+        'exp': now + TOKEN_TTL,
+        'video': {**VIDEO_GRANTS, 'room': room_name},
+    }
+
+    # Include metadata in token if provided
     if user_data and isinstance(user_data, dict):
-        metadata_str = json.dumps(user_data)
-        token.with_metadata(metadata_str)
-        print(f"✅ Set token metadata via with_metadata(): {metadata_str}")
+        metadata_str = orjson.dumps(user_data).decode()
+        claims['metadata'] = metadata_str
+        logger.debug("✅ Set token metadata: %s", metadata_str)
     else:
-        print("⚠️ No user_data provided or not a dict for token metadata")
+        logger.debug("⚠️ No user_data provided or not a dict for token metadata")
+
+    jwt_token = sign_jwt(claims)
+
+    # Explicitly dispatch an agent to the room (in the background, the JWT doesn't depend on it)
+    task = asyncio.create_task(dispatch_agent(request.app, room_name))
+    request.app['bg_tasks'].add(task)
+    task.add_done_callback(request.app['bg_tasks'].discard)
 
-    jwt_token = token.to_jwt()
+    # Token, identity and room are plain ASCII (base64url / hex), safe to splice in unescaped
+    body = TOKEN_RESPONSE_TEMPLATE % (jwt_token.encode(), identity.encode(), room_name.encode())
+    return web.Response(body=body, content_type='application/json')
 
-    # Explicitly dispatch an agent to the room
+
+async def dispatch_agent(app, room_name):
+    """Ask LiveKit to dispatch an agent to the given room."""
     try:
-        lk_api = api.LiveKitAPI(LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
-        await lk_api.agent_dispatch.create_dispatch(
+        await app['lk_api'].agent_dispatch.create_dispatch(
             api.CreateAgentDispatchRequest(room=room_name)
         )
-        await lk_api.aclose()
     except Exception as e:
-        print(f"Agent dispatch note: {e}")
+        logger.warning("Agent dispatch note: %s", e)
+
 
-    return web.json_response({
-        'token': jwt_token,
-        'url': LIVEKIT_URL,
-        'identity': identity,
-        'room': room_name,
-    })
+def _load_index_html():
+    """Return (body, etag) for index.html, re-reading it only when its mtime changes."""
+    now = time.monotonic()
+    if _index_cache['body'] is None or now >= _index_cache['next_check']:
+        try:
+            mtime = INDEX_HTML_PATH.stat().st_mtime
+            if mtime != _index_cache['mtime']:
+                body = INDEX_HTML_PATH.read_bytes()
+                etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+                _index_cache.update(mtime=mtime, body=body, etag=etag)
+        except OSError:
+            _index_cache.update(mtime=None, body=None, etag=None)
+            raise web.HTTPNotFound()
+        _index_cache['next_check'] = now + INDEX_RECHECK_INTERVAL
+    return _index_cache['body'], _index_cache['etag']
 
 
 async def serve_index(request):
-    """Serve the index.html file."""
-    return web.FileResponse(STATIC_DIR / 'index.html')
+    """Serve the index.html file from memory."""
+    body, etag = _load_index_html()
+    if request.headers.get('If-None-Match') == etag:
+        return web.Response(status=304, headers={'ETag': etag})
+    return web.Response(body=body, content_type='text/html', charset='utf-8', headers={'ETag': etag})
+
+
+# CORS headers for /api/ responses (any origin, no cookies involved)
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Expose-Headers': '*',
+}
+CORS_PREFLIGHT_HEADERS = {
+    **CORS_HEADERS,
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': '*',
+    'Access-Control-Max-Age': '86400',
+}
+
+
+@web.middleware
+async def cors_middleware(request, handler):
+    """Answer CORS preflights and add CORS headers to /api/ responses."""
+    if not request.path.startswith('/api/'):
+        return await handler(request)
+    if request.method == 'OPTIONS':
+        return web.Response(status=204, headers=CORS_PREFLIGHT_HEADERS)
+    response = await handler(request)
+    response.headers.update(CORS_HEADERS)
+    return response
+
+
+@web.middleware
+async def cache_control_middleware(request, handler):
+    """Set Cache-Control on static responses.
+
+    Fingerprinted files under /assets/ are cached forever; everything else
+    (index.html, index.js, index.css) must revalidate on each load.
+    """
+    response = await handler(request)
+    if not request.path.startswith('/api/') and 'Cache-Control' not in response.headers:
+        if request.path.startswith('/assets/'):
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _token_json_mtime():
+    """Return token.json's mtime, or None if it doesn't exist."""
+    try:
+        return TOKEN_JSON_PATH.stat().st_mtime
+    except OSError:
+        return None
 
 
-async def get_auth_status(request):
-    """Check authentication status for all spy tools services."""
+def _build_auth_status(token_mtime):
+    """Build the auth status payload for all spy tools services."""
     github_connected = bool(GITHUB_TOKEN)
 
     # Check for Google token - either from env var or file
@@ -131,54 +308,60 @@ async def get_auth_status(request):
     token_source = None
 
     # First check env var (for production)
-    google_token_env = os.getenv("GOOGLE_TOKEN_JSON")
-    if google_token_env:
-        try:
-            token_data = json.loads(google_token_env)
-            google_valid = 'token' in token_data or 'access_token' in token_data
-            token_source = "env"
-        except Exception:
-            pass
+    if GOOGLE_TOKEN_ENV_DATA is not None:
+        google_valid = GOOGLE_TOKEN_ENV_VALID
+        token_source = "env"
 
     # Then check file (for local dev)
-    if not google_valid and TOKEN_JSON_PATH.exists():
+    if not google_valid and token_mtime is not None:
         try:
-            with open(TOKEN_JSON_PATH) as f:
-                token_data = json.load(f)
-                google_valid = 'token' in token_data or 'access_token' in token_data
+            with open(TOKEN_JSON_PATH, 'rb') as f:
+                google_valid = _has_access_token(orjson.loads(f.read()))
                 token_source = "file"
         except Exception:
             pass
 
-    return web.json_response({
+    return {
         'google': {
             'connected': google_valid,
-            'hasCredentials': CREDENTIALS_JSON_PATH.exists() or bool(google_token_env),
+            'hasCredentials': CREDENTIALS_JSON_EXISTS or bool(GOOGLE_TOKEN_JSON),
             'source': token_source
         },
         'github': {
             'connected': github_connected,
         }
-    })
+    }
+
+
+async def get_auth_status(request):
+    """Check authentication status for all spy tools services."""
+    # Serve the cached status while it's fresh and token.json hasn't changed
+    now = time.monotonic()
+    token_mtime = _token_json_mtime()
+    if not (_auth_cache['body'] is not None and now < _auth_cache['expires']
+            and token_mtime == _auth_cache['mtime']):
+        body = orjson.dumps(_build_auth_status(token_mtime))
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        _auth_cache.update(mtime=token_mtime, body=body, etag=etag, expires=now + AUTH_STATUS_TTL)
+
+    # Let polling clients revalidate without re-downloading an unchanged status
+    etag = _auth_cache['etag']
+    if request.headers.get('If-None-Match') == etag:
+        return web.Response(status=304, headers={'ETag': etag})
+    return web.Response(body=_auth_cache['body'], content_type='application/json', headers={'ETag': etag})
 
 
 async def start_google_oauth(request):
     """Initiate Google OAuth flow."""
     # Check if already authorized via env var (production)
-    google_token_env = os.getenv("GOOGLE_TOKEN_JSON")
-    if google_token_env:
-        try:
-            token_data = json.loads(google_token_env)
-            if 'token' in token_data or 'access_token' in token_data:
-                return web.json_response({
-                    'success': True,
-                    'message': 'Google already authorized via environment variable!'
-                })
-        except Exception:
-            pass
+    if GOOGLE_TOKEN_ENV_VALID:
+        return json_response({
+            'success': True,
+            'message': 'Google already authorized via environment variable!'
+        })
 
-    if not CREDENTIALS_JSON_PATH.exists():
-        return web.json_response({
+    if not CREDENTIALS_JSON_EXISTS:
+        return json_response({
             'error': 'OAuth not available in production. Token must be set via GOOGLE_TOKEN_JSON environment variable.',
             'hint': 'Run locally first to generate token.json, then set GOOGLE_TOKEN_JSON on Railway.'
         }, status=400)
@@ -203,73 +386,123 @@ async def start_google_oauth(request):
         with open(TOKEN_JSON_PATH, 'w') as token:
             token.write(creds.to_json())
 
-        return web.json_response({
+        return json_response({
             'success': True,
             'message': 'Google authorization successful!'
         })
 
     except Exception as e:
-        return web.json_response({
+        return json_response({
             'error': f'OAuth flow failed: {str(e)}'
         }, status=500)
 
 
+async def tick_clock():
+    """Keep the cached clock current."""
+    while True:
+        _clock[0] = int(time.time())
+        await asyncio.sleep(CLOCK_TICK_INTERVAL)
+
+
+async def start_clock(app):
+    """Start the cached clock task on startup."""
+    _clock[0] = int(time.time())
+    app['clock_task'] = asyncio.create_task(tick_clock())
+
+
+async def stop_clock(app):
+    """Stop the cached clock task on shutdown."""
+    app['clock_task'].cancel()
+    await asyncio.gather(app['clock_task'], return_exceptions=True)
+
+
+async def init_livekit_api(app):
+    """Create the shared LiveKit API client on startup."""
+    app['lk_api'] = None
+    app['bg_tasks'] = set()
+    if LIVEKIT_CONFIGURED:
+        app['lk_api'] = api.LiveKitAPI(LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
+
+
+async def close_livekit_api(app):
+    """Close the shared LiveKit API client on shutdown."""
+    # Give in-flight agent dispatches a moment to finish, then cancel the rest
+    if app['bg_tasks']:
+        _, pending = await asyncio.wait(set(app['bg_tasks']), timeout=BG_TASK_SHUTDOWN_TIMEOUT)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    if app['lk_api'] is not None:
+        await app['lk_api'].aclose()
+
+
 def create_app():
     """Create and configure the aiohttp application."""
-    app = web.Application()
-
-    # Configure CORS
-    cors = aiohttp_cors.setup(app, defaults={
-        "*": aiohttp_cors.ResourceOptions(
-            allow_credentials=True,
-            expose_headers="*",
-            allow_headers="*",
-        )
-    })
+    app = web.Application(middlewares=[cors_middleware, cache_control_middleware])
+
+    # Shared LiveKit API client (reuses one HTTP session across requests)
+    app.on_startup.append(init_livekit_api)
+    app.on_cleanup.append(close_livekit_api)
+
+    # Optional cached clock for token timestamps
+    if CACHED_CLOCK:
+        app.on_startup.append(start_clock)
+        app.on_cleanup.append(stop_clock)
 
     # Routes
     app.router.add_get('/', serve_index)
 
     # Token endpoint - supports both GET and POST
-    resource_get = app.router.add_get('/api/token', get_token)
-    resource_post = app.router.add_post('/api/token', post_token)
-    cors.add(resource_get)
-    cors.add(resource_post)
+    # (without credentials, both methods go straight to a fixed 500 response)
+    if LIVEKIT_CONFIGURED:
+        app.router.add_get('/api/token', get_token)
+        app.router.add_post('/api/token', post_token)
+    else:
+        app.router.add_get('/api/token', token_not_configured)
+        app.router.add_post('/api/token', token_not_configured)
 
     # Auth status endpoint
-    auth_status = app.router.add_get('/api/auth/status', get_auth_status)
-    cors.add(auth_status)
+    app.router.add_get('/api/auth/status', get_auth_status)
 
     # Google OAuth endpoint
-    google_oauth = app.router.add_post('/api/auth/google', start_google_oauth)
-    cors.add(google_oauth)
+    app.router.add_post('/api/auth/google', start_google_oauth)
 
-    # Static files (CSS, JS)
+    # Static files (CSS, JS) - aiohttp serves precompressed .br/.gz siblings when present
     app.router.add_static('/', STATIC_DIR, show_index=False)
     
     return app
 
 
 if __name__ == '__main__':
-    print("=" * 50)
-    print("🐵 Cheeko Push-to-Talk Server")
-    print("=" * 50)
-    
+    logging.basicConfig(level=os.getenv('CHEEKO_LOG_LEVEL', 'INFO').upper(), format='%(message)s')
+    port = int(os.environ.get('PORT', 8000))
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("%s\n🐵 Cheeko Push-to-Talk Server\n%s", "=" * 50, "=" * 50)
+
     # Check configuration
-    if not all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET]):
-        print("\n⚠️  WARNING: LiveKit credentials not configured!")
-        print("Please edit .env.local with your credentials:")
-        print("  - LIVEKIT_URL")
-        print("  - LIVEKIT_API_KEY") 
-        print("  - LIVEKIT_API_SECRET")
-        print("  - GOOGLE_API_KEY")
-        print()
+    if not LIVEKIT_CONFIGURED:
+        logger.warning(
+            "\n⚠️  WARNING: LiveKit credentials not configured!\n"
+            "Please edit .env.local with your credentials:\n"
+            "  - LIVEKIT_URL\n"
+            "  - LIVEKIT_API_KEY\n"
+            "  - LIVEKIT_API_SECRET\n"
+            "  - GOOGLE_API_KEY\n"
+        )
     else:
-        print(f"\n✅ LiveKit URL: {LIVEKIT_URL}")
-    
-    print("\n🌐 Starting server at http://localhost:8000")
-    print("   Press Ctrl+C to stop\n")
-    
-    port = int(os.environ.get('PORT', 8000))
+        logger.info("\n✅ LiveKit URL: %s", LIVEKIT_URL)
+
+    logger.info("\n🌐 Starting server at http://localhost:%s\n   Press Ctrl+C to stop\n", port)
+
     app = create_app()
-    web.run_app(app, host='0.0.0.0', port=port, print=None)
+
+    # Use uvloop's libuv-based event loop when available (not on Windows)
+    try:
+        import uvloop
+        loop = uvloop.new_event_loop()
+    except ImportError:
+        loop = None
+
+    # No per-request access log lines; the platform's load balancer logs requests
+    web.run_app(app, host='0.0.0.0', port=port, print=None, access_log=None, loop=loop)
@@ -12,16 +12,28 @@ Usage:
         tools=[google.tools.GoogleSearch(), *spy_manager.get_tools()],
         ...
     )
+
+    await spy_manager.aclose()
 """
 
 import os
+import sys
+import time
+import asyncio
 import datetime
-import json
+import functools
+import tempfile
 from typing import Optional
 from pathlib import Path
 
+import aiohttp
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # Fall back to stdlib json
+    import json as orjson
+
 # LiveKit Agents
 from livekit.agents import function_tool
 
@@ -31,9 +43,6 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
 
-# GitHub
-from github import Github, GithubException
-
 # Project root (one level up from agent/)
 PROJECT_ROOT = Path(__file__).parent.parent
 
@@ -42,6 +51,67 @@ load_dotenv(PROJECT_ROOT / '.env.local')
 load_dotenv(PROJECT_ROOT / '.env')
 
 
+# GitHub REST API
+GITHUB_API_URL = "https://api.github.com"
+
+# datetime.fromisoformat() accepts a trailing 'Z' natively from Python 3.11
+_FAST_ISO = sys.version_info >= (3, 11)
+
+
+@functools.cache
+def _google_token_from_env() -> Optional[dict]:
+    """Parse GOOGLE_TOKEN_JSON once per process; None if unset or invalid."""
+    token_json_env = os.getenv("GOOGLE_TOKEN_JSON")
+    if not token_json_env:
+        return None
+    try:
+        return orjson.loads(token_json_env)
+    except orjson.JSONDecodeError as e:
+        print(f"[SpyTools] Failed to parse GOOGLE_TOKEN_JSON: {e}")
+        return None
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    """
+    Atomically replace `path` with `content` unless it already holds it.
+
+    Returns True if the file was written.
+    """
+    try:
+        if path.read_text() == content:
+            return False
+    except OSError:
+        pass
+
+    # Write to a temp file in the same directory, then rename over the target
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+
+# (date, start_of_day, end_of_day) for the current UTC day
+_day_bounds_cache = (None, None, None)
+
+
+def _utc_day_bounds() -> tuple[str, str]:
+    """Return today's UTC start/end as RFC 3339 strings, formatted once per day."""
+    global _day_bounds_cache
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    if _day_bounds_cache[0] != today:
+        _day_bounds_cache = (
+            today,
+            f"{today.isoformat()}T00:00:00Z",
+            f"{today.isoformat()}T23:59:59Z",
+        )
+    return _day_bounds_cache[1], _day_bounds_cache[2]
+
+
 class SpyToolsManager:
     """
     Manager class that handles authentication and provides spy tools
@@ -51,6 +121,8 @@ class SpyToolsManager:
     1. get_unread_email_summary - Peek into Gmail inbox
     2. check_calendar_today - Check today's schedule
     3. get_github_activity - Audit GitHub activity
+
+    plus full_audit, which runs all three concurrently.
     """
 
     # Google OAuth scopes (readonly only)
@@ -59,6 +131,9 @@ class SpyToolsManager:
         'https://www.googleapis.com/auth/calendar.readonly'
     ]
 
+    # How long (seconds) fetched GitHub activity is reused
+    GITHUB_CACHE_TTL = 60
+
     def __init__(
         self,
         credentials_path: Optional[str] = None,
@@ -80,8 +155,12 @@ class SpyToolsManager:
         # API clients (initialized in initialize())
         self._gmail_service = None
         self._calendar_service = None
-        self._github_client = None
+        # Each service owns one httplib2.Http, which is not thread-safe
+        self._gmail_lock = asyncio.Lock()
+        self._calendar_lock = asyncio.Lock()
+        self._github_http: Optional[aiohttp.ClientSession] = None
         self._github_username = None
+        self._github_cache = {'expires': 0.0, 'data': None}
 
         # Auth state
         self._google_authenticated = False
@@ -94,9 +173,14 @@ class SpyToolsManager:
         Returns:
             Dict with auth status: {"google": bool, "github": bool}
         """
+        # Auth does blocking network I/O, keep it off the event loop
+        google_ok, github_ok = await asyncio.gather(
+            asyncio.to_thread(self._init_google),
+            self._init_github(),
+        )
         results = {
-            "google": self._init_google(),
-            "github": self._init_github()
+            "google": google_ok,
+            "github": github_ok
         }
         print(f"[SpyTools] Auth status: Google={results['google']}, GitHub={results['github']}")
         return results
@@ -115,14 +199,13 @@ class SpyToolsManager:
             creds = None
 
             # Check for token from environment variable (for headless deployment)
-            token_json_env = os.getenv("GOOGLE_TOKEN_JSON")
-            if token_json_env:
+            token_data = _google_token_from_env()
+            if token_data:
                 try:
-                    token_data = json.loads(token_json_env)
                     creds = Credentials.from_authorized_user_info(token_data, self.SCOPES)
                     print("[SpyTools] Loaded Google credentials from GOOGLE_TOKEN_JSON env var")
                 except Exception as e:
-                    print(f"[SpyTools] Failed to parse GOOGLE_TOKEN_JSON: {e}")
+                    print(f"[SpyTools] Failed to load GOOGLE_TOKEN_JSON: {e}")
 
             # Load existing token from file
             if not creds and self._token_path.exists():
@@ -151,9 +234,8 @@ class SpyToolsManager:
                     creds = flow.run_local_server(port=0)
 
                 # Save token for future use
-                with open(self._token_path, 'w') as token:
-                    token.write(creds.to_json())
-                print(f"[SpyTools] Saved credentials to {self._token_path}")
+                if _write_if_changed(self._token_path, creds.to_json()):
+                    print(f"[SpyTools] Saved credentials to {self._token_path}")
 
             # Build services
             self._gmail_service = build('gmail', 'v1', credentials=creds)
@@ -167,26 +249,54 @@ class SpyToolsManager:
             self._google_authenticated = False
             return False
 
-    def _init_github(self) -> bool:
-        """Initialize GitHub client with token from environment."""
+    async def _init_github(self) -> bool:
+        """Initialize GitHub HTTP session with token from environment."""
         try:
             if not self._github_token:
                 print("[SpyTools] WARNING: GITHUB_TOKEN not found, GitHub spy disabled")
                 return False
 
-            self._github_client = Github(self._github_token)
+            # One keep-alive session for every GitHub call this manager makes
+            self._github_http = aiohttp.ClientSession(
+                base_url=GITHUB_API_URL,
+                headers={
+                    'Authorization': f'Bearer {self._github_token}',
+                    'Accept': 'application/vnd.github+json',
+                },
+                timeout=aiohttp.ClientTimeout(total=10),
+            )
             # Verify token works and get username
-            user = self._github_client.get_user()
-            self._github_username = user.login
+            user = await self._github_get("/user")
+            self._github_username = user['login']
             self._github_authenticated = True
             print(f"[SpyTools] GitHub authenticated as: {self._github_username}")
             return True
 
-        except GithubException as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             print(f"[SpyTools] GitHub auth failed: {e}")
             self._github_authenticated = False
             return False
 
+    async def _github_get(self, path: str, **params):
+        """GET a GitHub API path and return the decoded JSON body."""
+        async with self._github_http.get(path, params=params or None) as resp:
+            resp.raise_for_status()
+            return orjson.loads(await resp.read())
+
+    async def _fetch_github_activity(self) -> tuple[list, int, int]:
+        """Fetch recent events, public repo count and follower count."""
+        events, user = await asyncio.gather(
+            self._github_get(f"/users/{self._github_username}/events", per_page=15),
+            self._github_get("/user"),
+        )
+        return events, user['public_repos'], user['followers']
+
+    async def aclose(self) -> None:
+        """Close the GitHub HTTP session."""
+        if self._github_http is not None:
+            await self._github_http.close()
+            self._github_http = None
+
     def get_tools(self) -> list:
         """
         Return list of function tools for AgentSession.
@@ -216,42 +326,76 @@ class SpyToolsManager:
             return "Oh, you haven't given me access to your inbox yet. Scared of what I might find? Smart move, coward."
 
         try:
-            results = self._gmail_service.users().messages().list(
-                userId='me',
-                labelIds=['UNREAD', 'INBOX'],
-                maxResults=limit
-            ).execute()
+            async with self._gmail_lock:
+                results = await asyncio.to_thread(
+                    self._gmail_service.users().messages().list(
+                        userId='me',
+                        labelIds=['UNREAD', 'INBOX'],
+                        maxResults=limit
+                    ).execute
+                )
 
             messages = results.get('messages', [])
 
             if not messages:
                 return "Inbox zero? Either you're actually productive, or you've been ignoring everything and marked it all as read. I suspect the latter."
 
+            # Fetch all message headers in a single batched HTTP request
+            responses = {}
+
+            def collect(request_id, response, exception):
+                if exception is not None:
+                    raise exception
+                responses[request_id] = response
+
+            batch = self._gmail_service.new_batch_http_request(callback=collect)
+            for i, msg in enumerate(messages):
+                batch.add(
+                    self._gmail_service.users().messages().get(
+                        userId='me',
+                        id=msg['id'],
+                        format='metadata',
+                        metadataHeaders=['From', 'Subject', 'Date']
+                    ),
+                    request_id=str(i)
+                )
+            async with self._gmail_lock:
+                await asyncio.to_thread(batch.execute)
+
             summaries = []
-            for msg in messages:
-                msg_data = self._gmail_service.users().messages().get(
-                    userId='me',
-                    id=msg['id'],
-                    format='metadata',
-                    metadataHeaders=['From', 'Subject', 'Date']
-                ).execute()
-
-                headers = {h['name']: h['value'] for h in msg_data['payload']['headers']}
+            for i in range(len(messages)):
+                msg_data = responses[str(i)]
+                # Pick out the three headers we asked for, stopping once all are found
+                from_, subject, date = 'Unknown', 'No Subject', 'Unknown'
+                found = 0
+                for h in msg_data['payload']['headers']:
+                    name = h['name']
+                    if name == 'From':
+                        from_ = h['value']
+                        found += 1
+                    elif name == 'Subject':
+                        subject = h['value']
+                        found += 1
+                    elif name == 'Date':
+                        date = h['value']
+                        found += 1
+                    if found == 3:
+                        break
                 summaries.append({
-                    'from': headers.get('From', 'Unknown'),
-                    'subject': headers.get('Subject', 'No Subject'),
-                    'date': headers.get('Date', 'Unknown')
+                    'from': from_,
+                    'subject': subject,
+                    'date': date
                 })
 
             # Format for Cheeko's roasting
-            result = f"Found {len(summaries)} unread emails. Here's the damage:\n"
+            parts = [f"Found {len(summaries)} unread emails. Here's the damage:"]
             for i, s in enumerate(summaries, 1):
                 # Truncate long fields
                 from_field = s['from'][:40] + '...' if len(s['from']) > 40 else s['from']
                 subject_field = s['subject'][:50] + '...' if len(s['subject']) > 50 else s['subject']
-                result += f"{i}. From: {from_field} | Subject: {subject_field}\n"
+                parts.append(f"{i}. From: {from_field} | Subject: {subject_field}")
 
-            return result
+            return "\n".join(parts)
 
         except Exception as e:
             return f"Your inbox is giving me anxiety errors. I tried to check your email, but your digital life is as broken as your code. Error: {type(e).__name__}"
@@ -269,38 +413,39 @@ class SpyToolsManager:
 
         try:
             # Get today's date range in UTC
-            now = datetime.datetime.utcnow()
-            start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0).isoformat() + 'Z'
-            end_of_day = now.replace(hour=23, minute=59, second=59, microsecond=0).isoformat() + 'Z'
-
-            events_result = self._calendar_service.events().list(
-                calendarId='primary',
-                timeMin=start_of_day,
-                timeMax=end_of_day,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
+            start_of_day, end_of_day = _utc_day_bounds()
+
+            async with self._calendar_lock:
+                events_result = await asyncio.to_thread(
+                    self._calendar_service.events().list(
+                        calendarId='primary',
+                        timeMin=start_of_day,
+                        timeMax=end_of_day,
+                        singleEvents=True,
+                        orderBy='startTime'
+                    ).execute
+                )
 
             events = events_result.get('items', [])
 
             if not events:
                 return "Empty calendar today. Either you have no responsibilities, or you've given up on planning. Both are concerning for someone who claims to be 'busy'."
 
-            result = f"Today's schedule ({len(events)} events). Let's see what you're avoiding:\n"
+            parts = [f"Today's schedule ({len(events)} events). Let's see what you're avoiding:"]
             for event in events:
                 start = event['start'].get('dateTime', event['start'].get('date'))
                 # Parse and format the time nicely
                 if 'T' in start:
                     # Has time component
-                    dt = datetime.datetime.fromisoformat(start.replace('Z', '+00:00'))
+                    dt = datetime.datetime.fromisoformat(start if _FAST_ISO else start.replace('Z', '+00:00'))
                     time_str = dt.strftime('%I:%M %p')
                 else:
                     time_str = "All day"
 
                 summary = event.get('summary', 'Unnamed Event')
-                result += f"- {time_str}: {summary}\n"
+                parts.append(f"- {time_str}: {summary}")
 
-            return result
+            return "\n".join(parts)
 
         except Exception as e:
             return f"Calendar error. Your schedule is as broken as your time management. Error: {type(e).__name__}"
@@ -318,67 +463,96 @@ class SpyToolsManager:
             return "No GitHub access. Can't judge your code crimes today. Consider yourself lucky, but I'm judging you anyway."
 
         try:
-            user = self._github_client.get_user()
-
-            # Get recent events
-            events = list(user.get_events()[:15])
+            # Get recent events and profile stats (cached briefly, they change slowly)
+            now = time.monotonic()
+            if now >= self._github_cache['expires']:
+                self._github_cache['data'] = await self._fetch_github_activity()
+                self._github_cache['expires'] = now + self.GITHUB_CACHE_TTL
+            events, public_repos, followers = self._github_cache['data']
 
             if not events:
                 return f"No recent activity for {self._github_username}. Ghost developer detected. Are you even coding, or just pretending to be a developer?"
 
-            # Analyze activity
-            push_events = [e for e in events if e.type == 'PushEvent']
-            pr_events = [e for e in events if e.type == 'PullRequestEvent']
-            issue_events = [e for e in events if e.type in ['IssuesEvent', 'IssueCommentEvent']]
-
-            push_count = len(push_events)
-            pr_count = len(pr_events)
-            issue_count = len(issue_events)
-
-            result = f"GitHub audit for {self._github_username}:\n"
-            result += f"- Recent pushes: {push_count}\n"
-            result += f"- Pull requests: {pr_count}\n"
-            result += f"- Issues touched: {issue_count}\n"
-            result += f"- Public repos: {user.public_repos}\n"
-            result += f"- Followers: {user.followers}\n"
+            # Analyze activity in a single pass
+            push_count = pr_count = issue_count = 0
+            latest_push = None
+            for e in events:
+                event_type = e['type']
+                if event_type == 'PushEvent':
+                    push_count += 1
+                    if latest_push is None:
+                        latest_push = e
+                elif event_type == 'PullRequestEvent':
+                    pr_count += 1
+                elif event_type == 'IssuesEvent' or event_type == 'IssueCommentEvent':
+                    issue_count += 1
+
+            parts = [
+                f"GitHub audit for {self._github_username}:",
+                f"- Recent pushes: {push_count}",
+                f"- Pull requests: {pr_count}",
+                f"- Issues touched: {issue_count}",
+                f"- Public repos: {public_repos}",
+                f"- Followers: {followers}",
+            ]
 
             # Check most recent push
-            if push_events:
-                latest_push = push_events[0]
-                repo_name = latest_push.repo.name
-                push_time = latest_push.created_at
-                hours_ago = (datetime.datetime.utcnow() - push_time.replace(tzinfo=None)).total_seconds() / 3600
+            if latest_push is not None:
+                repo_name = latest_push['repo']['name']
+                created_at = latest_push['created_at']
+                push_time = datetime.datetime.fromisoformat(created_at if _FAST_ISO else created_at.replace('Z', '+00:00'))
+                hours_ago = (datetime.datetime.now(datetime.timezone.utc) - push_time).total_seconds() / 3600
 
                 if hours_ago < 1:
-                    result += f"\nLast commit: {int(hours_ago * 60)} minutes ago on {repo_name}. Okay, you're actually working. Don't let it go to your head."
+                    parts.append(f"\nLast commit: {int(hours_ago * 60)} minutes ago on {repo_name}. Okay, you're actually working. Don't let it go to your head.")
                 elif hours_ago < 24:
-                    result += f"\nLast commit: {int(hours_ago)} hours ago on {repo_name}."
+                    parts.append(f"\nLast commit: {int(hours_ago)} hours ago on {repo_name}.")
                 else:
                     days_ago = int(hours_ago / 24)
-                    result += f"\nLast commit: {days_ago} days ago on {repo_name}. Your GitHub is collecting dust."
+                    parts.append(f"\nLast commit: {days_ago} days ago on {repo_name}. Your GitHub is collecting dust.")
 
             # Verdict
             if push_count == 0:
-                result += "\n\nVerdict: Zero pushes in recent activity. Your GitHub contribution graph looks like a barcode at a liquidation sale."
+                parts.append("\nVerdict: Zero pushes in recent activity. Your GitHub contribution graph looks like a barcode at a liquidation sale.")
             elif push_count < 3:
-                result += "\n\nVerdict: Barely alive. Your contribution graph looks anemic. Ship something."
+                parts.append("\nVerdict: Barely alive. Your contribution graph looks anemic. Ship something.")
             else:
-                result += "\n\nVerdict: Some activity detected. You're not completely useless today."
+                parts.append("\nVerdict: Some activity detected. You're not completely useless today.")
 
-            return result
+            return "\n".join(parts)
 
-        except GithubException as e:
+        except aiohttp.ClientResponseError as e:
             if e.status == 404:
                 return f"User not found. Did your account get banned for pushing terrible code?"
             return f"GitHub API error. Even APIs are tired of your requests. Error: {e.status}"
         except Exception as e:
             return f"GitHub spy failed. Your code quality has infected my API calls. Error: {type(e).__name__}"
 
+    @function_tool()
+    async def full_audit(self) -> str:
+        """
+        Run every spy tool at once: inbox, today's calendar and GitHub activity.
+
+        Use this when you want the full picture of the user's digital life
+        in one go, e.g. when they claim to be "busy" or "working".
+        """
+        results = await asyncio.gather(
+            self.get_unread_email_summary(),
+            self.check_calendar_today(),
+            self.get_github_activity(),
+            return_exceptions=True
+        )
+        sections = ("EMAIL", "CALENDAR", "GITHUB")
+        parts = []
+        for section, result in zip(sections, results):
+            if isinstance(result, Exception):
+                result = f"{section.title()} spy failed. Error: {type(result).__name__}"
+            parts.append(f"=== {section} ===\n{result}")
+        return "\n\n".join(parts)
+
 
 # For standalone testing
 if __name__ == "__main__":
-    import asyncio
-
     async def test():
         manager = SpyToolsManager()
         auth = await manager.initialize()
@@ -398,4 +572,6 @@ if __name__ == "__main__":
             result = await manager.get_github_activity()
             print(result)
 
+        await manager.aclose()
+
     asyncio.run(test())
@@ -1,26 +1,64 @@
-const jwt = require('jsonwebtoken');
+const crypto = require('crypto');
 
-export default async function handler(req, res) {
-    // CORS headers
-    res.setHeader('Access-Control-Allow-Origin', '*');
-    res.setHeader('Access-Control-Allow-Methods', 'GET, POST, OPTIONS');
-    res.setHeader('Access-Control-Allow-Headers', 'Content-Type');
+// Configuration - read once per instance, env vars don't change while it's warm
+const LIVEKIT_URL = process.env.LIVEKIT_URL;
+const LIVEKIT_API_KEY = process.env.LIVEKIT_API_KEY;
+const LIVEKIT_API_SECRET = process.env.LIVEKIT_API_SECRET;
+const CREDENTIALS_OK = Boolean(LIVEKIT_URL && LIVEKIT_API_KEY && LIVEKIT_API_SECRET);
+
+// HMAC key object, created once per warm instance and reused for every token
+const SIGNING_KEY = CREDENTIALS_OK ? crypto.createSecretKey(Buffer.from(LIVEKIT_API_SECRET)) : null;
+
+// Every token shares the same HS256 header, so its base64url segment is fixed
+const JWT_HEADER = Buffer.from('{"alg":"HS256","typ":"JWT"}').toString('base64url');
+
+function signJwt(payload) {
+    const signingInput = `${JWT_HEADER}.${Buffer.from(JSON.stringify(payload)).toString('base64url')}`;
+    const signature = crypto.createHmac('sha256', SIGNING_KEY).update(signingInput).digest('base64url');
+    return `${signingInput}.${signature}`;
+}
+
+// CORS headers sent with every response
+const CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type',
+};
 
+// Preflight answer; Max-Age lets the browser skip repeat preflights for a day
+const PREFLIGHT_HEADERS = {
+    ...CORS_HEADERS,
+    'Access-Control-Max-Age': '86400',
+    'Content-Length': 0,
+};
+
+// Error bodies never change, so encode them once
+const ERR_CREDENTIALS = Buffer.from(JSON.stringify({ error: 'LiveKit credentials not configured' }));
+const ERR_GENERATION = Buffer.from(JSON.stringify({ error: 'Token generation failed' }));
+
+// Write status, headers and a JSON body in a single writeHead/end pair
+function sendJson(res, status, body) {
+    res.writeHead(status, {
+        ...CORS_HEADERS,
+        'Content-Type': 'application/json; charset=utf-8',
+        'Content-Length': body.length,
+    });
+    res.end(body);
+}
+
+export default async function handler(req, res) {
     if (req.method === 'OPTIONS') {
-        return res.status(200).end();
+        res.writeHead(204, PREFLIGHT_HEADERS);
+        return res.end();
     }
 
-    const LIVEKIT_URL = process.env.LIVEKIT_URL;
-    const LIVEKIT_API_KEY = process.env.LIVEKIT_API_KEY;
-    const LIVEKIT_API_SECRET = process.env.LIVEKIT_API_SECRET;
-
-    if (!LIVEKIT_URL || !LIVEKIT_API_KEY || !LIVEKIT_API_SECRET) {
-        return res.status(500).json({ error: 'LiveKit credentials not configured' });
+    if (!CREDENTIALS_OK) {
+        return sendJson(res, 500, ERR_CREDENTIALS);
     }
 
     try {
         const userDetails = req.body?.userDetails || {};
-        const sessionId = Math.random().toString(36).substring(2, 10);
+        const sessionId = crypto.randomBytes(4).toString('hex');
         const identity = `user-${sessionId}`;
         const roomName = `cheeko-room-${sessionId}`;  // Unique room per user!
         const userName = userDetails.name || 'User';
@@ -45,16 +83,16 @@ export default async function handler(req, res) {
             payload.metadata = JSON.stringify(userDetails);
         }
 
-        const token = jwt.sign(payload, LIVEKIT_API_SECRET, { algorithm: 'HS256' });
+        const token = signJwt(payload);
 
-        return res.status(200).json({
+        return sendJson(res, 200, Buffer.from(JSON.stringify({
             token,
             url: LIVEKIT_URL,
             identity,
             room: roomName,
-        });
+        })));
     } catch (error) {
         console.error('Token generation error:', error);
-        return res.status(500).json({ error: 'Token generation failed' });
+        return sendJson(res, 500, ERR_GENERATION);
     }
 }